@@ -6,17 +6,18 @@ A FastAPI backend for synchronized music listening rooms.
 
 import logging
 from contextlib import asynccontextmanager
+from typing import Optional
 
-from fastapi import FastAPI, Request, status
+from fastapi import Depends, FastAPI, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from src.core.config import settings
 from src.core.exceptions import VibesyncException
-from src.core.encryption import encrypt_response
+from src.core.encryption import encrypt_response, encrypt_response_msgpack
+from src.core.orjson_response import ORJSONResponse
 from src.api.rooms import router as rooms_router
 from src.api.search import router as search_router
 from src.services.jiosaavn_service import jiosaavn_service
@@ -32,56 +33,134 @@ logger = logging.getLogger(__name__)
 
 # ==================== Encryption Middleware ====================
 
-class ResponseEncryptionMiddleware(BaseHTTPMiddleware):
-    """Middleware to encrypt all JSON responses."""
+# Response header that exempts an endpoint from encryption (stripped before sending)
+SKIP_ENCRYPTION_HEADER = "X-Skip-Encrypt"
+_SKIP_ENCRYPTION_KEY = SKIP_ENCRYPTION_HEADER.lower().encode("latin-1")
+
+
+def skip_encryption(response: Response) -> None:
+    """Dependency marking an endpoint's response as exempt from encryption."""
+    response.headers[SKIP_ENCRYPTION_HEADER] = "1"
+
+
+class ResponseEncryptionMiddleware:
+    """
+    Pure ASGI middleware to encrypt all JSON responses.
+    
+    Intercepts the `http.response.start` / `http.response.body` messages
+    directly rather than going through BaseHTTPMiddleware, which adds an
+    extra task hop and wraps every response in a streaming iterator.
+    """
     
-    async def dispatch(self, request: Request, call_next):
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        # Docs and health probes are served in plain JSON
+        self._skip_prefixes = ("/docs", "/redoc", "/openapi.json", "/health")
+        # Prebuilt raw header tuples for encrypted responses
+        self._json_content_type = (b"content-type", b"application/json")
+        self._msgpack_content_type = (b"content-type", b"application/msgpack")
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
         """Intercept response and encrypt if JSON."""
-        response = await call_next(request)
-        
-        # Only encrypt JSON responses (not docs, static files, etc.)
+        # Skip before touching the response at all
         if (
-            response.status_code == 200 and
-            response.headers.get("content-type", "").startswith("application/json") and
-            not request.url.path.startswith("/docs") and
-            not request.url.path.startswith("/redoc") and
-            not request.url.path.startswith("/openapi.json")
+            scope["type"] != "http" or
+            scope["method"] == "HEAD" or
+            scope["path"].startswith(self._skip_prefixes)
         ):
-            # Read the original response body
-            body = b""
-            async for chunk in response.body_iterator:
-                body += chunk
+            await self.app(scope, receive, send)
+            return
+        
+        start_message: Optional[Message] = None
+        buffer = bytearray()
+        
+        async def send_wrapper(message: Message) -> None:
+            nonlocal start_message
             
-            try:
-                # Parse JSON and encrypt
-                import json
-                original_data = json.loads(body.decode())
-                encrypted_data = encrypt_response(original_data)
-                encrypted_json = json.dumps(encrypted_data)
-                encrypted_bytes = encrypted_json.encode('utf-8')
+            if message["type"] == "http.response.start":
+                # Single pass over the raw (lowercased) header names
+                content_type = b""
+                skip = False
+                for key, value in message["headers"]:
+                    if key == b"content-type":
+                        content_type = value
+                    elif key == _SKIP_ENCRYPTION_KEY:
+                        skip = True
                 
-                # Create new headers without Content-Length (it will be auto-calculated)
-                new_headers = {k: v for k, v in response.headers.items() if k.lower() != 'content-length'}
-                
-                # Return encrypted response with correct content length
-                return Response(
-                    content=encrypted_bytes,
-                    status_code=response.status_code,
-                    headers=new_headers,
-                    media_type="application/json"
-                )
-            except Exception as e:
-                # If encryption fails, return original response
-                logger.error(f"Encryption failed: {e}")
-                new_headers = {k: v for k, v in response.headers.items() if k.lower() != 'content-length'}
-                return Response(
-                    content=body,
-                    status_code=response.status_code,
-                    headers=new_headers,
-                    media_type="application/json"
-                )
+                # Endpoints opted out via skip_encryption pass straight through
+                if skip:
+                    message["headers"] = [
+                        header for header in message["headers"]
+                        if header[0] != _SKIP_ENCRYPTION_KEY
+                    ]
+                    await send(message)
+                    return
+                # Only encrypt successful JSON responses; hold the start
+                # message back until the full body is available
+                if message["status"] == 200 and content_type.startswith(b"application/json"):
+                    start_message = message
+                    return
+            elif message["type"] == "http.response.body" and start_message is not None:
+                # Accumulate the body (amortized O(n) buffer growth)
+                buffer.extend(message.get("body", b""))
+                if not message.get("more_body", False):
+                    await self._send_encrypted(scope, start_message, bytes(buffer), send)
+                return
+            
+            await send(message)
+        
+        await self.app(scope, receive, send_wrapper)
+    
+    async def _send_encrypted(
+        self,
+        scope: Scope,
+        start_message: Message,
+        body: bytes,
+        send: Send,
+    ) -> None:
+        """Encrypt the buffered body and send it with updated headers."""
+        # Nothing to protect in an empty body; forward it untouched
+        if not body:
+            await send(start_message)
+            await send({"type": "http.response.body", "body": body})
+            return
+        
+        # Clients can opt into the binary MessagePack envelope
+        wants_msgpack = any(
+            key == b"accept" and b"application/msgpack" in value
+            for key, value in scope["headers"]
+        )
         
-        return response
+        try:
+            # Encrypt the serialized body as-is; no need to re-parse it
+            if wants_msgpack:
+                encrypted_bytes = encrypt_response_msgpack(body)
+                content_type = self._msgpack_content_type
+            else:
+                encrypted_bytes = encrypt_response(body)
+                content_type = self._json_content_type
+        except Exception as e:
+            # If encryption fails, return original response
+            logger.error(f"Encryption failed: {e}")
+            await send(start_message)
+            await send({"type": "http.response.body", "body": body})
+            return
+        
+        # Swap in the new Content-Type / Content-Length, appending to any Vary
+        raw_headers = []
+        vary = b"Accept"
+        for key, value in start_message["headers"]:
+            if key == b"vary":
+                vary = value + b", Accept"
+            elif key != b"content-type" and key != b"content-length":
+                raw_headers.append((key, value))
+        raw_headers.append(content_type)
+        raw_headers.append((b"content-length", b"%d" % len(encrypted_bytes)))
+        raw_headers.append((b"vary", vary))
+        
+        start_message["headers"] = raw_headers
+        await send(start_message)
+        await send({"type": "http.response.body", "body": encrypted_bytes})
 
 
 # ==================== Lifespan Management ====================
@@ -124,6 +203,7 @@ app = FastAPI(
     """,
     version=settings.APP_VERSION,
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
     docs_url="/docs",
     redoc_url="/redoc",
 )
@@ -161,21 +241,19 @@ async def vibesync_exception_handler(request: Request, exc: VibesyncException):
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
     """Handle validation errors with user-friendly messages."""
-    errors = []
-    for error in exc.errors():
-        field = ".".join(str(loc) for loc in error["loc"])
-        errors.append({
-            "field": field,
-            "message": error["msg"],
-            "type": error["type"],
-        })
-    
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
         content={
             "success": False,
             "error": "Validation failed",
-            "details": errors,
+            "details": [
+                {
+                    "field": ".".join(map(str, error["loc"])),
+                    "message": error["msg"],
+                    "type": error["type"],
+                }
+                for error in exc.errors()
+            ],
         },
     )
 
@@ -208,6 +286,7 @@ app.include_router(search_router)
     tags=["Health"],
     summary="API Root",
     description="Welcome endpoint with API information.",
+    dependencies=[Depends(skip_encryption)],
 )
 async def root():
     """Welcome endpoint."""
@@ -240,6 +319,7 @@ async def health_check():
     tags=["Health"],
     summary="Server Stats",
     description="Get current server statistics.",
+    dependencies=[Depends(skip_encryption)],
 )
 async def server_stats():
     """Get server statistics."""
@@ -260,4 +340,9 @@ if __name__ == "__main__":
         port=settings.PORT,
         reload=settings.DEBUG,
         log_level="debug" if settings.DEBUG else "info",
+        # C-level event loop and HTTP parser in production (uvicorn[standard]);
+        # "auto" keeps local development working where uvloop is unavailable
+        loop="auto" if settings.DEBUG else "uvloop",
+        http="auto" if settings.DEBUG else "httptools",
+        access_log=settings.DEBUG,
     )
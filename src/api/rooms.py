@@ -2,7 +2,8 @@
 Room Management API endpoints.
 """
 
-from fastapi import APIRouter, Query, status
+from async_lru import alru_cache
+from fastapi import APIRouter, Query, Response, status
 from typing import Optional
 
 from src.models.schemas import (
@@ -14,6 +15,7 @@ from src.models.schemas import (
     SyncState,
     APIResponse,
     SongSuggestion,
+    SongBase,
 )
 from src.services.room_manager import room_manager
 from src.services.jiosaavn_service import jiosaavn_service
@@ -22,6 +24,17 @@ from src.core.exceptions import ExternalAPIError, SongNotFoundError
 router = APIRouter(prefix="/rooms", tags=["Rooms"])
 
 
+@alru_cache(maxsize=1024, ttl=300)
+async def _cached_suggestions(base_song_id: str, limit: int) -> list[SongBase]:
+    """
+    Fetch suggestions once per (song, limit) and share them across polls.
+    
+    Uses the raising variant so upstream failures propagate instead of
+    caching an empty list for the whole TTL.
+    """
+    return await jiosaavn_service.fetch_song_suggestions(base_song_id, limit)
+
+
 # ==================== Room Management ====================
 
 @router.post(
@@ -136,7 +149,7 @@ async def remove_from_queue(
     return APIResponse(
         success=True,
         message=f"'{removed_song.name}' removed from queue",
-        data={"removed_song": removed_song.model_dump()},
+        data={"removed_song": removed_song},
     )
 
 
@@ -148,14 +161,19 @@ async def remove_from_queue(
     summary="Get sync state",
     description="Get current playback sync state for synchronizing clients.",
 )
-async def get_sync_state(room_code: str) -> SyncState:
+async def get_sync_state(room_code: str) -> Response:
     """
     Get the current sync state.
     
     Frontend should calculate: seek_position = server_time - song_start_time
-    This endpoint also auto-advances to next song when current song ends.
+    Songs advance on the room's own timer when they end, so this read
+    reflects the new song without the client doing anything.
+    
+    Serialized in a single pydantic-core pass since this is the most
+    frequently polled endpoint.
     """
-    return room_manager.get_sync_state(room_code)
+    sync_state = room_manager.get_sync_state(room_code)
+    return Response(content=sync_state.model_dump_json(), media_type="application/json")
 
 
 @router.post(
@@ -175,7 +193,7 @@ async def skip_song(
         return APIResponse(
             success=True,
             message=f"Now playing: {next_song.name}",
-            data={"current_song": next_song.model_dump()},
+            data={"current_song": next_song},
         )
     else:
         return APIResponse(
@@ -235,7 +253,7 @@ async def get_suggestions(
         return SongSuggestion(success=True, suggestions=[])
     
     try:
-        suggestions = await jiosaavn_service.get_song_suggestions(base_song_id, limit)
+        suggestions = await _cached_suggestions(base_song_id, limit)
         return SongSuggestion(success=True, suggestions=suggestions)
     except Exception:
         return SongSuggestion(success=False, suggestions=[])
@@ -261,7 +279,7 @@ async def join_room(
     - current_song with all qualities, thumbnails, and artist info
     - all_stream_urls with quality options
     - seek_position_seconds (where to start playing)
-    - next_songs (next 3-5 songs for preloading)
+    - next_songs (next 5 songs for preloading)
     - queue (upcoming songs)
     """
     room = room_manager.join_room(room_code, user_id, username)
@@ -282,10 +300,10 @@ async def join_room(
             "download_url": sync_state.current_song.download_url,
             
             # Enhanced fields
-            "thumbnails": [t.model_dump() for t in sync_state.current_song.thumbnails],
-            "download_urls": [q.model_dump() for q in sync_state.current_song.download_urls],
-            "artists_simplified": [a.model_dump() for a in sync_state.current_song.artists_simplified],
-            "artists_detailed": [a.model_dump() for a in sync_state.current_song.artists_detailed],
+            "thumbnails": sync_state.current_song.thumbnails,
+            "download_urls": sync_state.current_song.download_urls,
+            "artists_simplified": sync_state.current_song.artists_simplified,
+            "artists_detailed": sync_state.current_song.artists_detailed,
             
             "added_by": sync_state.current_song.added_by_username,
         }
@@ -303,7 +321,7 @@ async def join_room(
             "current_song": current_song_data,
             
             # All quality options
-            "all_stream_urls": [q.model_dump() for q in sync_state.current_song.download_urls] if sync_state.current_song else [],
+            "all_stream_urls": sync_state.current_song.download_urls if sync_state.current_song else [],
             
             # Primary stream URL (for backward compatibility)
             "stream_url": sync_state.current_song.download_url if sync_state.current_song else None,
@@ -314,10 +332,10 @@ async def join_room(
             "song_start_time": sync_state.song_start_time.isoformat() if sync_state.song_start_time else None,
             
             # Next 3-5 songs for seamless playback
-            "next_songs": [s.model_dump() for s in sync_state.next_songs],
+            "next_songs": sync_state.next_songs,
             
             # Queue info
-            "queue": [s.model_dump() for s in room.queue],
+            "queue": list(room.queue),
             "queue_length": sync_state.queue_length,
         },
     )
@@ -360,7 +378,7 @@ async def get_stream_info(room_code: str) -> APIResponse:
     - seek_position_seconds: Where to seek in the audio
     - is_paused: Whether playback is paused
     - thumbnails: All thumbnail sizes
-    - next_songs: Next 3-5 songs for preloading
+    - next_songs: Next 5 songs for preloading
     
     Frontend should:
     1. Call this endpoint
@@ -379,7 +397,7 @@ async def get_stream_info(room_code: str) -> APIResponse:
                 "current_song": None,
                 "seek_position_seconds": 0,
                 "is_paused": False,
-                "next_songs": [s.model_dump() for s in sync_state.next_songs],
+                "next_songs": sync_state.next_songs,
                 "queue_length": sync_state.queue_length,
             },
         )
@@ -392,7 +410,7 @@ async def get_stream_info(room_code: str) -> APIResponse:
             "stream_url": sync_state.current_song.download_url,
             
             # All quality options
-            "all_stream_urls": [q.model_dump() for q in sync_state.current_song.download_urls],
+            "all_stream_urls": sync_state.current_song.download_urls,
             
             # Current song with all details
             "current_song": {
@@ -405,11 +423,11 @@ async def get_stream_info(room_code: str) -> APIResponse:
                 "image_url": sync_state.current_song.image_url,
                 
                 # All thumbnail sizes
-                "thumbnails": [t.model_dump() for t in sync_state.current_song.thumbnails],
+                "thumbnails": sync_state.current_song.thumbnails,
                 
                 # Artist info
-                "artists_simplified": [a.model_dump() for a in sync_state.current_song.artists_simplified],
-                "artists_detailed": [a.model_dump() for a in sync_state.current_song.artists_detailed],
+                "artists_simplified": sync_state.current_song.artists_simplified,
+                "artists_detailed": sync_state.current_song.artists_detailed,
                 
                 "duration": sync_state.current_song.duration,
                 "added_by": sync_state.current_song.added_by_username,
@@ -421,7 +439,7 @@ async def get_stream_info(room_code: str) -> APIResponse:
             "server_time": sync_state.server_time.isoformat(),
             
             # Next 3-5 songs for seamless playback
-            "next_songs": [s.model_dump() for s in sync_state.next_songs],
+            "next_songs": sync_state.next_songs,
             "queue_length": sync_state.queue_length,
         },
     )
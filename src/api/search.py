@@ -2,7 +2,7 @@
 Search API endpoints for JioSaavn integration.
 """
 
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, Query, Response
 
 from src.models.schemas import SearchSongsResponse, SongDetail, SongSuggestion
 from src.services.jiosaavn_service import jiosaavn_service
@@ -20,20 +20,23 @@ router = APIRouter(prefix="/search", tags=["Search"])
 async def search_songs(
     query: str = Query(..., min_length=1, description="Search query"),
     limit: int = Query(default=10, ge=1, le=50, description="Maximum results"),
-) -> SearchSongsResponse:
+) -> Response:
     """
     Search for songs.
     
     This endpoint allows users to find songs to add to their room's queue.
+    Serialized in a single pydantic-core pass rather than through the
+    response-model encode path, since result lists can be large.
     """
     results = await jiosaavn_service.search_songs(query, limit)
     
-    return SearchSongsResponse(
+    response = SearchSongsResponse(
         success=True,
         query=query,
         results=results,
         total=len(results),
     )
+    return Response(content=response.model_dump_json(), media_type="application/json")
 
 
 @router.get(
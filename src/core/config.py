@@ -31,6 +31,7 @@ class Settings(BaseSettings):
     # Room Settings
     ROOM_CODE_LENGTH: int = 6
     MAX_QUEUE_SIZE: int = 100
+    SYNC_NEXT_SONGS: int = 5  # Upcoming songs included in each sync response
     DEFAULT_ROOM_CODE: str = "DEFAULT"
     DEFAULT_ROOM_HOST_ID: str = "system"
     DEFAULT_ROOM_HOST_NAME: str = "VibeSync Radio"
@@ -2,11 +2,20 @@
 Pydantic schemas for request/response validation.
 """
 
+import asyncio
+from functools import cached_property
 from pydantic import BaseModel, Field
 from typing import Optional, Any
 from datetime import datetime
 from enum import Enum
-from collections import deque
+from collections import Counter, deque
+from dataclasses import dataclass, field
+
+
+def _normalize_for_match(text: str) -> str:
+    """Lowercase and drop spaces so near-identical titles compare equal."""
+    # Three C-level string passes; measured faster than one str.translate
+    return text.lower().strip().replace(" ", "")
 
 
 # ============== Song Models ==============
@@ -19,6 +28,7 @@ class SongQuality(BaseModel):
     
     class Config:
         from_attributes = True
+        frozen = True
 
 
 class Thumbnail(BaseModel):
@@ -30,6 +40,7 @@ class Thumbnail(BaseModel):
     
     class Config:
         from_attributes = True
+        frozen = True
 
 
 class ArtistSimplified(BaseModel):
@@ -41,6 +52,7 @@ class ArtistSimplified(BaseModel):
     
     class Config:
         from_attributes = True
+        frozen = True
 
 
 class ArtistDetailed(ArtistSimplified):
@@ -52,6 +64,7 @@ class ArtistDetailed(ArtistSimplified):
     
     class Config:
         from_attributes = True
+        frozen = True
 
 
 class SongBase(BaseModel):
@@ -95,6 +108,17 @@ class QueuedSong(SongBase):
     added_by_username: str
     added_at: datetime = Field(default_factory=datetime.utcnow)
     
+    @cached_property
+    def norm_key(self) -> str:
+        """
+        Normalized name and artist used for fuzzy duplicate detection.
+        
+        Joined into one string (NUL-separated, so fields can't run into
+        each other) because str caches its hash: set lookups and discards
+        reuse it instead of re-hashing a tuple each time.
+        """
+        return f"{_normalize_for_match(self.name)}\x00{_normalize_for_match(self.artists)}"
+    
 
 # ============== Room Models ==============
 
@@ -105,31 +129,42 @@ class PlaybackState(str, Enum):
     PAUSED = "paused"
 
 
-class Room(BaseModel):
-    """Room model for internal storage."""
+@dataclass(slots=True)
+class Room:
+    """
+    Room state for internal storage.
+    
+    A slotted dataclass rather than a model: it is only ever built and
+    mutated by RoomManager and never validated or serialized directly.
+    """
     room_code: str
     host_user_id: str
     host_username: str
-    created_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: datetime = field(default_factory=datetime.utcnow)
     
     # Playback state
     current_song: Optional[QueuedSong] = None
-    song_start_time: Optional[datetime] = None  # When the current song started
-    is_paused: bool = False
-    pause_position: float = 0.0  # Position in seconds when paused
+    effective_start_monotonic: Optional[float] = None  # Monotonic time at which position 0 would have played
+    pause_offset: Optional[float] = None  # Position in seconds while paused; None = playing
+    advance_timer: Optional[asyncio.TimerHandle] = None  # Fires when the current song ends
     
-    # Queue
-    queue: list[QueuedSong] = Field(default_factory=list)
+    # Queue (FIFO: append at the tail, pop from the head)
+    queue: deque[QueuedSong] = field(default_factory=deque)
+    queue_index: dict[str, QueuedSong] = field(default_factory=dict)  # queue_id: queued song
+    queued_song_ids: set[str] = field(default_factory=set)  # JioSaavn IDs currently in queue
+    queued_song_keys: set[str] = field(default_factory=set)  # Normalized name/artist keys in queue
     
     # Room members (for future use)
-    members: dict[str, str] = Field(default_factory=dict)  # user_id: username
+    members: dict[str, str] = field(default_factory=dict)  # user_id: username
     
     # Moderation features
-    recently_played: list[QueuedSong] = Field(default_factory=list)  # Last 10 played songs
-    user_pending_counts: dict[str, int] = Field(default_factory=dict)  # user_id: count
+    recently_played: deque[QueuedSong] = field(default_factory=lambda: deque(maxlen=10))  # Last 10 played songs
+    user_pending_counts: Counter[str] = field(default_factory=Counter)  # user_id: count
     
-    class Config:
-        arbitrary_types_allowed = True
+    @property
+    def is_paused(self) -> bool:
+        """Whether playback is paused (derived from `pause_offset`)."""
+        return self.pause_offset is not None
 
 
 class RoomState(BaseModel):
@@ -158,7 +193,8 @@ class SyncState(BaseModel):
     # Calculated seek position (for convenience)
     seek_position_seconds: float = 0.0
     
-    # All songs in queue (upcoming songs)
+    # Up to 5 upcoming songs (settings.SYNC_NEXT_SONGS) for preloading;
+    # queue_length still reports the full queue
     next_songs: list[QueuedSong] = Field(default_factory=list)
     
     # Queue info
@@ -3,16 +3,34 @@ JioSaavn API Service for fetching song data.
 """
 
 import httpx
-from typing import Optional
+import orjson
+from async_lru import alru_cache
+from itertools import islice
+from typing import Any, Iterable, Optional
 import logging
 
 from src.core.config import settings
 from src.core.exceptions import ExternalAPIError
-from src.models.schemas import SongBase, SongDetail, SongQuality, Thumbnail, ArtistSimplified, ArtistDetailed
+from src.models.schemas import SongBase, SongDetail
 
 logger = logging.getLogger(__name__)
 
 
+def _loads(response: httpx.Response) -> Any:
+    """Decode a JSON response body straight from its raw bytes."""
+    return orjson.loads(response.content)
+
+
+def _extract_last_image_url(images: Any) -> Optional[str]:
+    """Pick the last (highest quality) URL from an image list or plain string."""
+    if isinstance(images, list) and images:
+        last = images[-1]
+        return last.get("url") if isinstance(last, dict) else last
+    if isinstance(images, str):
+        return images
+    return None
+
+
 class JioSaavnService:
     """Service for interacting with JioSaavn API."""
     
@@ -29,17 +47,117 @@ class JioSaavnService:
                 base_url=self.base_url,
                 timeout=self.timeout,
                 headers={"Accept": "application/json"},
+                # HTTP/2 multiplexes concurrent lookups over one connection;
+                # the pool keeps it warm across requests from all rooms.
+                # Retries only cover failed connection attempts.
+                transport=httpx.AsyncHTTPTransport(
+                    http2=True,
+                    retries=1,
+                    limits=httpx.Limits(
+                        max_keepalive_connections=32,
+                        max_connections=64,
+                        keepalive_expiry=60,
+                    ),
+                ),
             )
         return self._client
     
     async def close(self) -> None:
-        """Close the HTTP client."""
+        """Close the HTTP client and drop cached lookups."""
+        self.search_songs.cache_clear()
+        self.get_song_details.cache_clear()
         if self._client and not self._client.is_closed:
             await self._client.aclose()
             self._client = None
     
-    def _parse_song_data(self, song_data: dict) -> SongBase:
-        """Parse raw song data from API response."""
+    def _song_fields(self, song_data: dict) -> dict[str, Any]:
+        """
+        Extract normalized SongBase field values from raw API song data.
+        
+        Both parsers leave nested values as plain dicts, so the caller
+        builds and validates the song with one model_validate call.
+        """
+        try:
+            return self._song_fields_fast(song_data)
+        except (KeyError, TypeError, AttributeError) as e:
+            # Logged so a bug in the fast path can't hide behind the fallback
+            logger.debug(
+                "Fast song parse failed for %r (%s: %s); using generic parser",
+                song_data.get("id") if isinstance(song_data, dict) else None,
+                type(e).__name__, e,
+            )
+            return self._song_fields_generic(song_data)
+    
+    def _song_fields_fast(self, song_data: dict) -> dict[str, Any]:
+        """
+        Straight-line field extraction for the usual JioSaavn song shape.
+        
+        Assumes lists of dicts for images, download URLs and artists, with
+        the keys the API normally sends. Any deviation raises, and
+        `_song_fields` falls back to the generic parser. Output matches
+        `_song_fields_generic` for the shapes handled here: both return
+        plain dicts that the single model_validate validates and coerces.
+        """
+        images = song_data.get("image", [])
+        download_urls = song_data.get("downloadUrl", [])
+        if type(images) is not list or type(download_urls) is not list:
+            raise TypeError("Unexpected media field shape")
+        
+        thumbnails = [{"url": img["url"], "quality": img["quality"]} for img in images]
+        
+        download_urls_list = [
+            {"quality": dl["quality"], "url": dl["url"], "bitrate": dl.get("bitrate")}
+            for dl in download_urls
+            if dl["url"]
+        ]
+        
+        artists_simplified = []
+        artists_detailed = []
+        all_names = []
+        artists_data = song_data["artists"]
+        for role, artists in (("primary", artists_data.get("primary", ())), ("featured", artists_data.get("featured", ()))):
+            for artist in artists:
+                artist_id = artist["id"]
+                artist_name = artist["name"]
+                artist_images = artist.get("image")
+                if artist_images:
+                    artist_image = artist_images[-1]["url"]
+                else:
+                    # An empty string is kept as-is, like the generic parser
+                    artist_image = artist_images if isinstance(artist_images, str) else None
+                
+                simplified = {"id": artist_id, "name": artist_name, "role": role, "image_url": artist_image}
+                artists_simplified.append(simplified)
+                artists_detailed.append(dict(
+                    simplified,
+                    bio=artist.get("bio"),
+                    follower_count=artist.get("followerCount"),
+                    is_verified=artist.get("isVerified"),
+                    url=artist.get("url"),
+                ))
+                all_names.append(artist_name)
+        
+        return dict(
+            id=song_data["id"],
+            name=song_data["name"],
+            download_urls=download_urls_list,
+            thumbnails=thumbnails,
+            artists_simplified=artists_simplified,
+            artists_detailed=artists_detailed,
+            artists=", ".join(all_names) or song_data.get("primaryArtists", ""),
+            album=song_data["album"]["name"],
+            image_url=thumbnails[-1]["url"] if thumbnails else None,
+            duration=int(song_data.get("duration", 0)),
+            download_url=download_urls_list[-1]["url"] if download_urls_list else None,
+        )
+    
+    def _song_fields_generic(self, song_data: dict) -> dict[str, Any]:
+        """
+        Extract song fields from any of the response shapes the API has used.
+        
+        Upstream data is untrusted, so nested entries stay plain dicts and
+        are validated (and coerced) by the caller's single model_validate.
+        """
         # Extract all image/thumbnail URLs (all sizes)
         thumbnails = []
         images = song_data.get("image", [])
@@ -48,31 +166,16 @@ class JioSaavnService:
                 if isinstance(img, dict):
                     url = img.get("url", "")
                     quality = img.get("quality", f"quality_{idx}")
-                    thumbnails.append(Thumbnail(
-                        url=url,
-                        quality=quality,
-                        width=None,
-                        height=None,
-                    ))
+                    thumbnails.append({"url": url, "quality": quality})
                 elif isinstance(img, str):
-                    thumbnails.append(Thumbnail(
-                        url=img,
-                        quality=f"quality_{idx}",
-                        width=None,
-                        height=None,
-                    ))
+                    thumbnails.append({"url": img, "quality": f"quality_{idx}"})
         elif isinstance(images, str):
-            thumbnails.append(Thumbnail(
-                url=images,
-                quality="default",
-                width=None,
-                height=None,
-            ))
+            thumbnails.append({"url": images, "quality": "default"})
         
         # Fallback to default image_url
         image_url = None
         if thumbnails:
-            image_url = thumbnails[-1].url  # Use highest quality as default
+            image_url = thumbnails[-1]["url"]  # Use highest quality as default
         
         # Extract all download URLs (all qualities)
         download_urls_list = []
@@ -84,28 +187,16 @@ class JioSaavnService:
                     quality = dl.get("quality", "")
                     bitrate = dl.get("bitrate")
                     if url:
-                        download_urls_list.append(SongQuality(
-                            quality=quality,
-                            url=url,
-                            bitrate=bitrate,
-                        ))
+                        download_urls_list.append({"quality": quality, "url": url, "bitrate": bitrate})
                 elif isinstance(dl, str):
-                    download_urls_list.append(SongQuality(
-                        quality="unknown",
-                        url=dl,
-                        bitrate=None,
-                    ))
+                    download_urls_list.append({"quality": "unknown", "url": dl, "bitrate": None})
         elif isinstance(download_urls, str):
-            download_urls_list.append(SongQuality(
-                quality="default",
-                url=download_urls,
-                bitrate=None,
-            ))
+            download_urls_list.append({"quality": "default", "url": download_urls, "bitrate": None})
         
         # Fallback to single download_url
         download_url = None
         if download_urls_list:
-            download_url = download_urls_list[-1].url  # Use highest quality as default
+            download_url = download_urls_list[-1]["url"]  # Use highest quality as default
         
         # Extract artist information (simplified and detailed)
         artists_simplified = []
@@ -117,72 +208,32 @@ class JioSaavnService:
             primary = artists_data.get("primary", [])
             featured = artists_data.get("featured", [])
             
-            # Process primary artists
-            for artist in primary:
-                if isinstance(artist, dict):
-                    artist_id = artist.get("id", "")
-                    artist_name = artist.get("name", "")
-                    artist_image = None
-                    
-                    # Extract artist image
-                    artist_images = artist.get("image", [])
-                    if isinstance(artist_images, list) and artist_images:
-                        artist_image = artist_images[-1].get("url") if isinstance(artist_images[-1], dict) else artist_images[-1]
-                    elif isinstance(artist_images, str):
-                        artist_image = artist_images
-                    
-                    artists_simplified.append(ArtistSimplified(
-                        id=artist_id,
-                        name=artist_name,
-                        role="primary",
-                        image_url=artist_image,
-                    ))
-                    
-                    # Create detailed artist info
-                    artists_detailed.append(ArtistDetailed(
-                        id=artist_id,
-                        name=artist_name,
-                        role="primary",
-                        image_url=artist_image,
-                        bio=artist.get("bio"),
-                        follower_count=artist.get("followerCount"),
-                        is_verified=artist.get("isVerified"),
-                        url=artist.get("url"),
-                    ))
+            all_names = []
             
-            # Process featured artists
-            for artist in featured:
-                if isinstance(artist, dict):
+            # Primary and featured artists share one pass
+            for role, artists in (("primary", primary), ("featured", featured)):
+                for artist in artists:
+                    if not isinstance(artist, dict):
+                        continue
+                    
                     artist_id = artist.get("id", "")
                     artist_name = artist.get("name", "")
-                    artist_image = None
-                    
-                    artist_images = artist.get("image", [])
-                    if isinstance(artist_images, list) and artist_images:
-                        artist_image = artist_images[-1].get("url") if isinstance(artist_images[-1], dict) else artist_images[-1]
-                    elif isinstance(artist_images, str):
-                        artist_image = artist_images
+                    artist_image = _extract_last_image_url(artist.get("image", []))
                     
-                    artists_simplified.append(ArtistSimplified(
-                        id=artist_id,
-                        name=artist_name,
-                        role="featured",
-                        image_url=artist_image,
-                    ))
+                    simplified = {"id": artist_id, "name": artist_name, "role": role, "image_url": artist_image}
+                    artists_simplified.append(simplified)
                     
-                    artists_detailed.append(ArtistDetailed(
-                        id=artist_id,
-                        name=artist_name,
-                        role="featured",
-                        image_url=artist_image,
+                    # Create detailed artist info
+                    artists_detailed.append(dict(
+                        simplified,
                         bio=artist.get("bio"),
                         follower_count=artist.get("followerCount"),
                         is_verified=artist.get("isVerified"),
                         url=artist.get("url"),
                     ))
+                    all_names.append(artist_name)
             
             # Create comma-separated string
-            all_names = [a.name for a in artists_simplified]
             artists_str = ", ".join(all_names)
             
         elif isinstance(artists_data, str):
@@ -192,16 +243,17 @@ class JioSaavnService:
         if not artists_str:
             artists_str = song_data.get("primaryArtists", "")
         
-        # Extract album info
-        album = ""
-        if isinstance(song_data.get("album"), dict):
-            album = song_data.get("album", {}).get("name", "")
-        else:
-            album = song_data.get("album", "")
+        # Extract album info (a single lookup for either shape)
+        album = song_data.get("album", "")
+        if isinstance(album, dict):
+            album = album.get("name", "")
+        
+        # Only fall back to "title" when "name" is absent
+        name = song_data["name"] if "name" in song_data else song_data.get("title", "Unknown")
         
-        return SongBase(
+        return dict(
             id=song_data.get("id", ""),
-            name=song_data.get("name", song_data.get("title", "Unknown")),
+            name=name,
             download_urls=download_urls_list,
             thumbnails=thumbnails,
             artists_simplified=artists_simplified,
@@ -213,10 +265,33 @@ class JioSaavnService:
             download_url=download_url,
         )
     
+    def _parse_song_data(self, song_data: dict) -> SongBase:
+        """Parse raw song data from API response."""
+        return SongBase.model_validate(self._song_fields(song_data))
+    
+    def _safe_parse(self, song_data: dict, kind: str) -> Optional[SongBase]:
+        """Parse raw song data, logging and returning None if it is malformed."""
+        try:
+            return self._parse_song_data(song_data)
+        except Exception as e:
+            logger.warning(f"Failed to parse {kind}: {e}")
+            return None
+    
+    def _parse_songs(self, results: Iterable[dict], kind: str) -> list[SongBase]:
+        """Parse a batch of raw songs, skipping any that fail to parse."""
+        return [
+            song for song in (self._safe_parse(song_data, kind) for song_data in results)
+            if song is not None
+        ]
+    
+    @alru_cache(maxsize=512, ttl=300)
     async def search_songs(self, query: str, limit: int = 10) -> list[SongBase]:
         """
         Search for songs by query.
         
+        Results are cached per (query, limit) for a few minutes, and
+        concurrent identical searches share one upstream request.
+        
         Args:
             query: Search query string
             limit: Maximum number of results
@@ -231,7 +306,7 @@ class JioSaavnService:
             )
             response.raise_for_status()
             
-            data = response.json()
+            data = _loads(response)
             
             # Handle different response structures
             results = []
@@ -248,15 +323,7 @@ class JioSaavnService:
             elif isinstance(data, list):
                 results = data
             
-            songs = []
-            for song_data in results:
-                try:
-                    songs.append(self._parse_song_data(song_data))
-                except Exception as e:
-                    logger.warning(f"Failed to parse song data: {e}")
-                    continue
-            
-            return songs
+            return self._parse_songs(results, "song data")
             
         except httpx.HTTPStatusError as e:
             logger.error(f"JioSaavn API error: {e.response.status_code} - {e.response.text}")
@@ -268,10 +335,14 @@ class JioSaavnService:
             logger.error(f"Unexpected error in search_songs: {e}")
             raise ExternalAPIError("JioSaavn", str(e))
     
+    @alru_cache(maxsize=4096, ttl=300)
     async def get_song_details(self, song_id: str) -> Optional[SongDetail]:
         """
         Get detailed information about a song.
         
+        Cached per song ID, so search, add and display lookups for the
+        same song hit JioSaavn once; concurrent lookups are deduplicated.
+        
         Args:
             song_id: JioSaavn song ID
             
@@ -282,7 +353,7 @@ class JioSaavnService:
             response = await self.client.get(f"/api/songs/{song_id}")
             response.raise_for_status()
             
-            data = response.json()
+            data = _loads(response)
             
             # Handle nested response structure
             song_data = data
@@ -294,14 +365,17 @@ class JioSaavnService:
                     elif isinstance(inner_data, dict):
                         song_data = inner_data
             
-            base_song = self._parse_song_data(song_data)
+            # Build the detail model in one step rather than dumping a
+            # SongBase and re-validating it
+            year = song_data.get("year")
+            play_count = song_data.get("playCount")
             
-            return SongDetail(
-                **base_song.model_dump(),
+            return SongDetail.model_validate(dict(
+                self._song_fields(song_data),
                 language=song_data.get("language"),
-                year=song_data.get("year"),
-                play_count=song_data.get("playCount"),
-            )
+                year=str(year) if year is not None else None,
+                play_count=play_count,
+            ))
             
         except httpx.HTTPStatusError as e:
             if e.response.status_code == 404:
@@ -320,12 +394,34 @@ class JioSaavnService:
         """
         Get song suggestions based on a song.
         
+        Args:
+            song_id: JioSaavn song ID to base suggestions on
+            limit: Maximum number of suggestions
+            
+        Returns:
+            List of suggested songs, or an empty list if the lookup fails
+        """
+        try:
+            return await self.fetch_song_suggestions(song_id, limit)
+        except ExternalAPIError:
+            return []
+    
+    async def fetch_song_suggestions(self, song_id: str, limit: int = 10) -> list[SongBase]:
+        """
+        Get song suggestions based on a song, raising on upstream failure.
+        
+        Lets callers that cache the result (see `rooms._cached_suggestions`)
+        tell a failed lookup apart from a genuinely empty one.
+        
         Args:
             song_id: JioSaavn song ID to base suggestions on
             limit: Maximum number of suggestions
             
         Returns:
             List of suggested songs
+            
+        Raises:
+            ExternalAPIError: If the JioSaavn request fails
         """
         try:
             response = await self.client.get(
@@ -334,7 +430,7 @@ class JioSaavnService:
             )
             response.raise_for_status()
             
-            data = response.json()
+            data = _loads(response)
             
             # Handle different response structures
             results = []
@@ -346,22 +442,17 @@ class JioSaavnService:
             elif isinstance(data, list):
                 results = data
             
-            songs = []
-            for song_data in results[:limit]:
-                try:
-                    songs.append(self._parse_song_data(song_data))
-                except Exception as e:
-                    logger.warning(f"Failed to parse suggestion: {e}")
-                    continue
-            
-            return songs
+            return self._parse_songs(islice(results, limit), "suggestion")
             
         except httpx.HTTPStatusError as e:
             logger.warning(f"Failed to get suggestions for {song_id}: {e.response.status_code}")
-            return []
+            raise ExternalAPIError("JioSaavn", f"HTTP {e.response.status_code}")
+        except httpx.RequestError as e:
+            logger.warning(f"Failed to get suggestions: {e}")
+            raise ExternalAPIError("JioSaavn", "Service unavailable")
         except Exception as e:
             logger.warning(f"Failed to get suggestions: {e}")
-            return []
+            raise ExternalAPIError("JioSaavn", str(e))
 
 
 # Global singleton instance
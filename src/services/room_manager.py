@@ -2,12 +2,14 @@
 Room Manager Service for handling room state and operations.
 """
 
+import asyncio
+import base64
 import secrets
-import string
 import logging
-from datetime import datetime
+import time
+from datetime import datetime, timedelta
+from itertools import islice
 from typing import Optional
-import uuid
 
 from src.core.config import settings
 from src.core.exceptions import (
@@ -38,6 +40,11 @@ class RoomManager:
     
     This is an in-memory implementation for MVP.
     State is lost on server restart.
+    
+    All methods are synchronous and never await, so on the single event
+    loop each mutation (including the advance timer callback) runs to
+    completion before any other request or callback can touch the room.
+    No locking is needed as long as that holds.
     """
     
     def __init__(self):
@@ -56,19 +63,21 @@ class RoomManager:
             members={settings.DEFAULT_ROOM_HOST_ID: settings.DEFAULT_ROOM_HOST_NAME},
         )
         self._rooms[settings.DEFAULT_ROOM_CODE] = default_room
-        logger.info(f"🎵 Default room '{settings.DEFAULT_ROOM_CODE}' created - Community music room")
+        logger.info("🎵 Default room '%s' created - Community music room", settings.DEFAULT_ROOM_CODE)
     
     def _generate_room_code(self) -> str:
         """Generate a unique room code."""
-        characters = string.ascii_uppercase + string.digits
+        # One CSPRNG read per attempt; base32 yields A-Z and 2-7, 5 bits per character
+        num_bytes = (settings.ROOM_CODE_LENGTH * 5 + 7) // 8
         while True:
-            code = ''.join(secrets.choice(characters) for _ in range(settings.ROOM_CODE_LENGTH))
+            raw = secrets.token_bytes(num_bytes)
+            code = base64.b32encode(raw).decode("ascii")[:settings.ROOM_CODE_LENGTH]
             if code not in self._rooms:
                 return code
     
     def _generate_queue_id(self) -> str:
         """Generate a unique queue entry ID."""
-        return str(uuid.uuid4())[:8]
+        return secrets.token_hex(4)
     
     # ==================== Room Operations ====================
     
@@ -93,7 +102,7 @@ class RoomManager:
         )
         
         self._rooms[room_code] = room
-        logger.info(f"Room created: {room_code} by {username}")
+        logger.info("Room created: %s by %s", room_code, username)
         
         return room
     
@@ -110,10 +119,16 @@ class RoomManager:
         Raises:
             RoomNotFoundError: If room doesn't exist
         """
-        room = self._rooms.get(room_code.upper())
-        if not room:
-            raise RoomNotFoundError(room_code)
-        return room
+        # Codes are stored uppercase and clients normally send them that
+        # way: index directly, and only allocate an uppercased copy on a miss
+        try:
+            return self._rooms[room_code]
+        except KeyError:
+            pass
+        try:
+            return self._rooms[room_code.upper()]
+        except KeyError:
+            raise RoomNotFoundError(room_code) from None
     
     def get_room_state(self, room_code: str) -> RoomState:
         """
@@ -133,9 +148,11 @@ class RoomManager:
             host_username=room.host_username,
             created_at=room.created_at,
             current_song=room.current_song,
-            song_start_time=room.song_start_time,
+            song_start_time=self._song_start_time(
+                room, datetime.utcnow(), self._calculate_seek_position(room)
+            ),
             is_paused=room.is_paused,
-            queue=room.queue,
+            queue=list(room.queue),
             queue_length=len(room.queue),
             member_count=len(room.members),
         )
@@ -160,65 +177,36 @@ class RoomManager:
             raise DefaultRoomProtectedError()
         
         if room_code in self._rooms:
-            del self._rooms[room_code]
-            logger.info(f"Room deleted: {room_code}")
+            self._cancel_advance(self._rooms.pop(room_code))
+            logger.info("Room deleted: %s", room_code)
             return True
         return False
     
     def room_exists(self, room_code: str) -> bool:
         """Check if a room exists."""
-        return room_code.upper() in self._rooms
+        return room_code in self._rooms or room_code.upper() in self._rooms
     
     # ==================== Moderation Helpers ====================
     
-    def _is_song_similar(self, song1: QueuedSong, song2: QueuedSong) -> bool:
-        """
-        Fuzzy match songs by ID and normalized name/artist.
-        
-        Args:
-            song1: First song to compare
-            song2: Second song to compare
-            
-        Returns:
-            True if songs are considered the same or very similar
-        """
-        # Exact ID match
-        if song1.id == song2.id:
-            return True
-        
-        # Normalize and compare name + artist
-        def normalize(text: str) -> str:
-            return text.lower().strip().replace(" ", "")
-        
-        name1 = normalize(song1.name)
-        name2 = normalize(song2.name)
-        artist1 = normalize(song1.artists)
-        artist2 = normalize(song2.artists)
-        
-        # If name and artist match (fuzzy), consider it a duplicate
-        if name1 == name2 and artist1 == artist2:
-            return True
-        
-        return False
-    
-    def _increment_user_count(self, room: Room, user_id: str) -> None:
-        """Increment pending song count for a user."""
-        room.user_pending_counts[user_id] = room.user_pending_counts.get(user_id, 0) + 1
+    def _forget_queued(self, room: Room, song: QueuedSong) -> None:
+        """Drop a song that left the queue from the lookup index and duplicate-check sets."""
+        room.queue_index.pop(song.queue_id, None)
+        room.queued_song_ids.discard(song.id)
+        room.queued_song_keys.discard(song.norm_key)
     
     def _decrement_user_count(self, room: Room, user_id: str) -> None:
         """Decrement pending song count for a user."""
-        if user_id in room.user_pending_counts:
-            room.user_pending_counts[user_id] = max(0, room.user_pending_counts[user_id] - 1)
-            # Clean up if count is 0
-            if room.user_pending_counts[user_id] == 0:
-                del room.user_pending_counts[user_id]
+        counts = room.user_pending_counts
+        if user_id in counts:
+            counts[user_id] -= 1
+            # Clean up once the user has nothing pending
+            if counts[user_id] <= 0:
+                del counts[user_id]
     
     def _add_to_history(self, room: Room, song: QueuedSong) -> None:
         """Add song to recently played history (max 10 items)."""
+        # Bounded deque drops the oldest entry on its own
         room.recently_played.append(song)
-        # Keep only last 10
-        if len(room.recently_played) > 10:
-            room.recently_played.pop(0)
     
     # ==================== Queue Operations ====================
     
@@ -250,12 +238,16 @@ class RoomManager:
         """
         room = self.get_room(room_code)
         
+        queue = room.queue
+        qlen = len(queue)
+        pending = room.user_pending_counts
+        
         # Check 1: Queue capacity
-        if len(room.queue) >= settings.MAX_QUEUE_SIZE:
+        if qlen >= settings.MAX_QUEUE_SIZE:
             raise QueueFullError(settings.MAX_QUEUE_SIZE)
         
         # Check 2: User quota (max 3 songs per user)
-        user_pending = room.user_pending_counts.get(user_id, 0)
+        user_pending = pending[user_id]
         if user_pending >= 3:
             raise UserQuotaExceededError(max_songs=3)
         
@@ -282,22 +274,29 @@ class RoomManager:
         )
         
         # Check 4: Duplicate in current queue (only check pending songs, not history)
-        for queued_song in room.queue:
-            if self._is_song_similar(queued_song, temp_song):
-                raise DuplicateSongError(f"'{song.name}' is already in the queue")
+        # Songs with the same ID or normalized (name, artist) are duplicates
+        song_key = temp_song.norm_key
+        if song.id in room.queued_song_ids or song_key in room.queued_song_keys:
+            raise DuplicateSongError(f"'{song.name}' is already in the queue")
         
         # All checks passed - add to queue
-        room.queue.append(temp_song)
-        position = len(room.queue)
+        queue.append(temp_song)
+        room.queue_index[temp_song.queue_id] = temp_song
+        room.queued_song_ids.add(temp_song.id)
+        room.queued_song_keys.add(song_key)
+        position = qlen + 1
         
         # Increment user's pending count
-        self._increment_user_count(room, user_id)
+        pending[user_id] = user_pending + 1
         
         # Auto-start playback if this is the first song and nothing is playing
-        if room.current_song is None and len(room.queue) == 1:
+        if room.current_song is None and qlen == 0:
             self._start_next_song(room)
         
-        logger.info(f"Song added to queue in room {room_code}: {song.name} by {username} (pending: {room.user_pending_counts.get(user_id, 0)})")
+        logger.info(
+            "Song added to queue in room %s: %s by %s (pending: %d)",
+            room_code, song.name, username, user_pending + 1,
+        )
         
         return temp_song, position
     
@@ -326,14 +325,7 @@ class RoomManager:
         room = self.get_room(room_code)
         
         # Find the song in queue
-        song_index = None
-        song = None
-        for i, queued_song in enumerate(room.queue):
-            if queued_song.queue_id == queue_id:
-                song_index = i
-                song = queued_song
-                break
-        
+        song = room.queue_index.get(queue_id)
         if song is None:
             raise SongNotFoundError(queue_id)
         
@@ -344,25 +336,34 @@ class RoomManager:
                 "Only the song adder or room host can remove this song"
             )
         
-        # Remove from queue
-        removed_song = room.queue.pop(song_index)
+        # Remove from queue; match by identity to skip model equality checks
+        for i, queued_song in enumerate(room.queue):
+            if queued_song is song:
+                del room.queue[i]
+                break
+        self._forget_queued(room, song)
+        removed_song = song
         
         # Decrement user's pending count
         self._decrement_user_count(room, removed_song.added_by_user_id)
         
-        logger.info(f"Song removed from queue in room {room_code}: {removed_song.name} by user {requesting_user_id}")
+        logger.info(
+            "Song removed from queue in room %s: %s by user %s",
+            room_code, removed_song.name, requesting_user_id,
+        )
         
         return removed_song
     
     # ==================== Playback Operations ====================
     
-    def _start_next_song(self, room: Room) -> bool:
+    def _start_next_song(self, room: Room, now: Optional[float] = None) -> bool:
         """
         Start playing the next song in queue.
         Updates history and decrements user count for completed song.
         
         Args:
             room: Room instance
+            now: `time.monotonic()` reading, if the caller already has one
             
         Returns:
             True if a song was started, False if queue is empty
@@ -371,25 +372,66 @@ class RoomManager:
         if room.current_song is not None:
             self._add_to_history(room, room.current_song)
             self._decrement_user_count(room, room.current_song.added_by_user_id)
-            logger.info(f"Song completed in room {room.room_code}: {room.current_song.name}")
+            logger.info("Song completed in room %s: %s", room.room_code, room.current_song.name)
         
         if not room.queue:
             room.current_song = None
-            room.song_start_time = None
-            room.is_paused = False
-            room.pause_position = 0.0
+            room.effective_start_monotonic = None
+            room.pause_offset = None
+            self._cancel_advance(room)
             return False
         
         # Pop first song from queue
-        next_song = room.queue.pop(0)
+        next_song = room.queue.popleft()
+        self._forget_queued(room, next_song)
         room.current_song = next_song
-        room.song_start_time = datetime.utcnow()
-        room.is_paused = False
-        room.pause_position = 0.0
+        room.effective_start_monotonic = now if now is not None else time.monotonic()
+        room.pause_offset = None
+        self._schedule_advance(room)
         
-        logger.info(f"Now playing in room {room.room_code}: {next_song.name}")
+        logger.info("Now playing in room %s: %s", room.room_code, next_song.name)
         return True
     
+    def _schedule_advance(self, room: Room) -> None:
+        """
+        Arm a timer that starts the next song when the current one ends.
+        
+        Replaces polling for the end of the song on every sync request.
+        Outside a running event loop no timer is set, and `get_sync_state`
+        falls back to checking the position itself.
+        """
+        self._cancel_advance(room)
+        
+        song = room.current_song
+        if song is None or room.is_paused or song.duration <= 0:
+            return
+        
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        
+        remaining = song.duration - self._calculate_seek_position(room)
+        room.advance_timer = loop.call_later(
+            max(0.0, remaining), self._advance_if_current, room, song.queue_id
+        )
+    
+    def _cancel_advance(self, room: Room) -> None:
+        """Cancel a pending auto-advance timer, if any."""
+        if room.advance_timer is not None:
+            room.advance_timer.cancel()
+            room.advance_timer = None
+    
+    def _advance_if_current(self, room: Room, queue_id: str) -> None:
+        """Timer callback: advance only if the same song is still playing."""
+        room.advance_timer = None
+        if (
+            room.current_song is not None and
+            room.current_song.queue_id == queue_id and
+            not room.is_paused
+        ):
+            self._start_next_song(room)
+    
     def skip_current(self, room_code: str, requesting_user_id: str) -> Optional[QueuedSong]:
         """
         Skip to the next song.
@@ -430,32 +472,33 @@ class RoomManager:
         if room.current_song is None:
             raise QueueEmptyError()
         
-        if room.is_paused:
-            # Resume: adjust start time to account for pause duration
-            if room.song_start_time:
-                pause_duration = room.pause_position
-                room.song_start_time = datetime.utcnow()
-                # Adjust start time backwards to maintain position
-                from datetime import timedelta
-                room.song_start_time = room.song_start_time - timedelta(seconds=pause_duration)
-            room.is_paused = False
+        if room.pause_offset is not None:
+            # Resume: shift the effective start back by the paused position
+            room.effective_start_monotonic = time.monotonic() - room.pause_offset
+            room.pause_offset = None
+            self._schedule_advance(room)
         else:
             # Pause: record current position
-            room.pause_position = self._calculate_seek_position(room)
-            room.is_paused = True
+            room.pause_offset = self._calculate_seek_position(room)
+            self._cancel_advance(room)
         
-        logger.info(f"Room {room_code} pause state: {room.is_paused}")
+        logger.info("Room %s pause state: %s", room_code, room.is_paused)
         return room.is_paused
     
-    def _calculate_seek_position(self, room: Room) -> float:
-        """Calculate current seek position in seconds."""
-        if room.is_paused:
-            return room.pause_position
+    def _calculate_seek_position(self, room: Room, now: Optional[float] = None) -> float:
+        """
+        Calculate current seek position in seconds.
         
-        if room.song_start_time is None or room.current_song is None:
+        Uses plain float arithmetic on the monotonic clock; `now` is a
+        `time.monotonic()` reading if the caller already has one.
+        """
+        if room.pause_offset is not None:
+            return room.pause_offset
+        
+        if room.effective_start_monotonic is None or room.current_song is None:
             return 0.0
         
-        elapsed = (datetime.utcnow() - room.song_start_time).total_seconds()
+        elapsed = (now if now is not None else time.monotonic()) - room.effective_start_monotonic
         
         # Cap at song duration
         if room.current_song.duration > 0:
@@ -463,6 +506,22 @@ class RoomManager:
         
         return max(0.0, elapsed)
     
+    def _song_start_time(
+        self,
+        room: Room,
+        now: datetime,
+        seek_position: float,
+    ) -> Optional[datetime]:
+        """
+        Wall-clock time at which the current song would have started.
+        
+        Only derived when a response needs it; the room itself keeps
+        playback state on the monotonic clock.
+        """
+        if room.current_song is None:
+            return None
+        return now - timedelta(seconds=seek_position)
+    
     def get_sync_state(self, room_code: str) -> SyncState:
         """
         Get synchronization state for clients.
@@ -471,25 +530,28 @@ class RoomManager:
             room_code: Room code
             
         Returns:
-            Current sync state with next 3-5 songs
+            Current sync state with up to `SYNC_NEXT_SONGS` upcoming songs
         """
         room = self.get_room(room_code)
+        # Single wall-clock read for timestamps, single monotonic read for seek math
+        now = datetime.utcnow()
+        now_monotonic = time.monotonic()
         
-        # Check if current song has ended (auto-advance)
-        if room.current_song and not room.is_paused:
-            seek_pos = self._calculate_seek_position(room)
+        # Songs normally advance on their timer; only check here if none is armed
+        if room.current_song and not room.is_paused and room.advance_timer is None:
+            seek_pos = self._calculate_seek_position(room, now_monotonic)
             if room.current_song.duration > 0 and seek_pos >= room.current_song.duration:
-                self._start_next_song(room)
+                self._start_next_song(room, now_monotonic)
         
-        seek_position = self._calculate_seek_position(room)
+        seek_position = self._calculate_seek_position(room, now_monotonic)
         
-        # Get all songs from queue
-        next_songs = room.queue
+        # Only the head of the queue, so payload size stays bounded for long queues
+        next_songs = list(islice(room.queue, settings.SYNC_NEXT_SONGS))
         
         return SyncState(
             current_song=room.current_song,
-            server_time=datetime.utcnow(),
-            song_start_time=room.song_start_time,
+            server_time=now,
+            song_start_time=self._song_start_time(room, now, seek_position),
             is_paused=room.is_paused,
             seek_position_seconds=seek_position,
             next_songs=next_songs,
@@ -503,7 +565,7 @@ class RoomManager:
         """Add a member to the room."""
         room = self.get_room(room_code)
         room.members[user_id] = username
-        logger.info(f"User {username} joined room {room_code}")
+        logger.info("User %s joined room %s", username, room_code)
         return room
     
     def leave_room(self, room_code: str, user_id: str) -> bool:
@@ -511,7 +573,7 @@ class RoomManager:
         room = self.get_room(room_code)
         if user_id in room.members:
             del room.members[user_id]
-            logger.info(f"User {user_id} left room {room_code}")
+            logger.info("User %s left room %s", user_id, room_code)
             return True
         return False
     